@@ -4,6 +4,7 @@ from pathlib import Path
 from typing import List, Tuple, Optional
 from PIL import Image
 import importlib.util
+from .image_utils import ImageRenderer
 
 CV2_AVAILABLE = importlib.util.find_spec("cv2") is not None
 
@@ -18,11 +19,15 @@ else:
 class VideoGenerator:
     """Generate videos from image sequences."""
     
-    def __init__(self, fps: int = 10, output_format: str = "mp4"):
+    def __init__(self, fps: int = 10, output_format: str = "mp4", hw_acceleration: bool = False):
         self.fps = fps
         self.output_format = output_format
+        self.hw_acceleration = hw_acceleration
         self.codec = 'mp4v' if output_format == "mp4" else 'XVID'
         self.extension = '.mp4' if output_format == "mp4" else '.avi'
+        # Hardware encoders only exist for H.264, not mp4v/XVID. Whether one
+        # is present is learned on the first open and reused for every video.
+        self._use_hw = hw_acceleration and output_format == "mp4"
         
         if not CV2_AVAILABLE:
             raise ImportError("opencv-python is required for video generation")
@@ -31,32 +36,86 @@ class VideoGenerator:
     def is_available() -> bool:
         return CV2_AVAILABLE
     
+    def _open_writer(self, output_path: Path, size: Tuple[int, int]):
+        if self._use_hw:
+            writer = cv2.VideoWriter(
+                str(output_path), cv2.CAP_FFMPEG, cv2.VideoWriter_fourcc(*'avc1'),
+                self.fps, size,
+                [cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+            )
+            if writer.isOpened():
+                return writer
+            # No hardware encoder here; skip the failing probe from now on
+            self._use_hw = False
+        fourcc = cv2.VideoWriter_fourcc(*self.codec)
+        return cv2.VideoWriter(str(output_path), fourcc, self.fps, size)
+    
     def create_video_from_frames(
         self,
         frames: List[Image.Image],
         output_path: Path,
         size: Optional[Tuple[int, int]] = None
     ) -> Path:
-        if not frames:
+        return self.create_video_from_segments(
+            [(frame, 1) for frame in frames], output_path, size
+        )
+    
+    def create_video_from_segments(
+        self,
+        segments: List[Tuple[Image.Image, int]],
+        output_path: Path,
+        size: Optional[Tuple[int, int]] = None
+    ) -> Path:
+        """Write each (frame, repeat_count) pair, converting every unique frame once."""
+        if not segments:
             raise ValueError("No frames provided")
         
         if size is None:
-            size = frames[0].size
+            size = segments[0][0].size
         
-        width, height = size
+        with self.open_stream(output_path, size) as stream:
+            for frame, repeat in segments:
+                stream.write(frame, repeat)
+        return stream.output_path
+    
+    def open_stream(self, output_path: Path, size: Tuple[int, int]) -> "VideoStream":
+        """Open a video for writing frames one at a time as they are produced."""
         output_path = Path(output_path).with_suffix(self.extension)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        fourcc = cv2.VideoWriter_fourcc(*self.codec)
-        writer = cv2.VideoWriter(str(output_path), fourcc, self.fps, (width, height))
-        
-        for frame in frames:
-            if frame.size != size:
-                frame = frame.resize(size, Image.Resampling.LANCZOS)
-            frame_rgb = frame.convert('RGB')
-            frame_array = np.array(frame_rgb)
-            frame_bgr = cv2.cvtColor(frame_array, cv2.COLOR_RGB2BGR)
-            writer.write(frame_bgr)
-        
-        writer.release()
-        return output_path
+        return VideoStream(self._open_writer(output_path, size), output_path, size)
+
+
+class VideoStream:
+    """Frame-by-frame video writer returned by VideoGenerator.open_stream."""
+    
+    def __init__(self, writer, output_path: Path, size: Tuple[int, int]):
+        self.writer = writer
+        self.output_path = output_path
+        self.size = size
+        # Reused for every frame so encoding does not allocate per write
+        self._frame_bgr = None
+    
+    def write(self, frame: Image.Image, repeat: int = 1) -> None:
+        """Convert the frame once and write it repeat times."""
+        if frame.size != self.size:
+            frame = frame.resize(self.size, Image.Resampling.LANCZOS)
+        if frame.mode == 'RGBA':
+            # Alpha is dropped by the same pass that reorders channels to BGR
+            code, frame_array = cv2.COLOR_RGBA2BGR, np.asarray(frame)
+        else:
+            # Frames are only read, so RGB frames are used as-is without copying
+            frame_rgb = ImageRenderer.ensure_rgb(frame)
+            code, frame_array = cv2.COLOR_RGB2BGR, np.asarray(frame_rgb)
+        self._frame_bgr = cv2.cvtColor(frame_array, code, dst=self._frame_bgr)
+        for _ in range(repeat):
+            self.writer.write(self._frame_bgr)
+    
+    def close(self) -> Path:
+        self.writer.release()
+        return self.output_path
+    
+    def __enter__(self) -> "VideoStream":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
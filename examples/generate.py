@@ -2,6 +2,7 @@
 """Task generation script."""
 
 import argparse
+import os
 from pathlib import Path
 import sys
 
@@ -17,6 +18,9 @@ def main():
     parser.add_argument("--output", type=str, default="data/questions")
     parser.add_argument("--seed", type=int, default=None)
     parser.add_argument("--no-videos", action="store_true")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Worker processes (0 = one per CPU core)"
+    )
     
     args = parser.parse_args()
     
@@ -27,6 +31,7 @@ def main():
         random_seed=args.seed,
         output_dir=Path(args.output),
         generate_videos=not args.no_videos,
+        num_workers=args.workers or os.cpu_count(),
     )
     
     generator = TaskGenerator(config)
@@ -20,6 +20,8 @@ class TaskConfig(GenerationConfig):
     
     generate_videos: bool = Field(default=True)
     video_fps: int = Field(default=10)
+    video_hw_acceleration: bool = Field(default=False, description="Try a hardware H.264 encoder, falling back to mp4v")
+    num_workers: int = Field(default=1, description="Processes used to generate tasks in parallel")
     
     # Grid settings
     min_grid_size: int = Field(default=4, description="Minimum grid dimension")
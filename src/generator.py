@@ -11,46 +11,110 @@ Features:
 
 import random
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Set
-from PIL import Image, ImageDraw, ImageFont
+from typing import List, NamedTuple, Tuple
+import numpy as np
+from PIL import Image, ImageDraw
 
 from core import BaseGenerator, TaskPair, ImageRenderer
 from core.video_utils import VideoGenerator
 from .config import TaskConfig
+from .path_tracing import NUMBA_AVAILABLE, NUMBA_MIN_GRID_SIZE, trace_path_nb
 from .prompts import get_prompt
 
 
+class GridLayout(NamedTuple):
+    """Pixel geometry of a task's grid, shared by every image of the task."""
+
+    cell_size: int
+    start_x: int
+    start_y: int
+    centers: List[List[Tuple[int, int]]]  # centers[row][col] = (cx, cy)
+
+
+# Per-process generator used by generate_dataset when num_workers > 1
+_worker_generator = None
+
+
+def _init_worker(config_data: dict) -> None:
+    global _worker_generator
+    # The parent already validated this config
+    _worker_generator = TaskGenerator(TaskConfig.model_construct(**config_data))
+
+
+def _generate_in_worker(task_id: str) -> TaskPair:
+    return _worker_generator.generate_task_pair(task_id)
+
+
 class TaskGenerator(BaseGenerator):
     """Arrow maze navigation task generator."""
 
     DIRECTIONS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+    DIRECTION_NAMES = tuple(DIRECTIONS)
+
+    # Integer direction encoding for the compiled path kernel: row/col offset per index
+    DIRECTION_INDEX = {name: i for i, name in enumerate(DIRECTION_NAMES)}
+    DR = tuple(dy for _, dy in DIRECTIONS.values())
+    DC = tuple(dx for dx, _ in DIRECTIONS.values())
 
     def __init__(self, config: TaskConfig):
         super().__init__(config)
         self.renderer = ImageRenderer(image_size=config.image_size)
+        self._arrow_sprites = {}
+        self._agent_sprite = None
 
         self.video_generator = None
         if config.generate_videos and VideoGenerator.is_available():
             self.video_generator = VideoGenerator(
-                fps=config.video_fps, output_format="mp4"
+                fps=config.video_fps,
+                output_format="mp4",
+                hw_acceleration=config.video_hw_acceleration,
             )
 
+    def generate_dataset(self) -> List[TaskPair]:
+        """Generate complete dataset, spreading tasks over num_workers processes."""
+        if self.config.num_workers <= 1:
+            return super().generate_dataset()
+
+        task_ids = [
+            f"{self.config.domain}_{i:04d}" for i in range(self.config.num_samples)
+        ]
+        pairs = []
+        with ProcessPoolExecutor(
+            max_workers=self.config.num_workers,
+            initializer=_init_worker,
+            initargs=(self.config.model_dump(),),
+        ) as executor:
+            for pair in executor.map(_generate_in_worker, task_ids, chunksize=8):
+                pairs.append(pair)
+                print(f"  Generated: {pair.task_id}")
+        return pairs
+
     def generate_task_pair(self, task_id: str) -> TaskPair:
+        if self.config.random_seed is not None:
+            # Seed per task so results do not depend on which worker runs it
+            random.seed(f"{self.config.random_seed}:{task_id}")
+
         task_data = self._generate_task_data()
 
-        first_image = self._render_initial_state(task_data)
-        final_image = self._render_final_state(task_data)
+        # Layout and static background are shared by every image of the task
+        layout = self._grid_layout(task_data)
+        background = self._render_static_background(task_data, layout)
+
+        first_image = self._render_initial_state(task_data, background, layout)
+        final_image = self._render_final_state(task_data, background, layout)
 
         video_path = None
         if self.config.generate_videos and self.video_generator:
             video_path = self._generate_video(
-                first_image, final_image, task_id, task_data
+                first_image, final_image, task_id, task_data, background, layout
             )
 
         prompt = get_prompt(task_data)
 
-        return TaskPair(
+        # Every field is produced right here, so skip re-validating each pair
+        return TaskPair.model_construct(
             task_id=task_id,
             domain=self.config.domain,
             prompt=prompt,
@@ -111,7 +175,7 @@ class TaskGenerator(BaseGenerator):
                 grid[row][col] = random.choice(valid_directions)
             else:
                 # Fallback: choose any direction if no valid ones exist
-                grid[row][col] = random.choice(list(self.DIRECTIONS.keys()))
+                grid[row][col] = random.choice(self.DIRECTION_NAMES)
 
         return grid
 
@@ -165,24 +229,38 @@ class TaskGenerator(BaseGenerator):
         return problematic
 
     def _trace_path(self, grid, start_row, start_col, grid_size):
+        # Common zero-step case: the start arrow already points outside the grid
+        dx, dy = self.DIRECTIONS[grid[start_row][start_col]]
+        next_row, next_col = start_row + dy, start_col + dx
+        if not (0 <= next_row < grid_size and 0 <= next_col < grid_size):
+            return [(start_row, start_col)]
+
+        if NUMBA_AVAILABLE and grid_size >= NUMBA_MIN_GRID_SIZE:
+            # Only the compiled kernel needs the grid as direction indices
+            grid_int = np.array(
+                [[self.DIRECTION_INDEX[d] for d in row] for row in grid], dtype=np.int8
+            )
+            path = trace_path_nb(grid_int, start_row, start_col, self.DR, self.DC)
+            return [(row, col) for row, col in path.tolist()]
+
         path = [(start_row, start_col)]
-        visited = {(start_row, start_col)}
         current_row, current_col = start_row, start_col
+        # Bit r * grid_size + c is set once cell (r, c) has been visited
+        visited = 1 << (start_row * grid_size + start_col)
 
         for _ in range(grid_size * grid_size + 1):
-            direction = grid[current_row][current_col]
-            dx, dy = self.DIRECTIONS[direction]
-            next_col, next_row = current_col + dx, current_row + dy
+            dx, dy = self.DIRECTIONS[grid[current_row][current_col]]
+            next_row, next_col = current_row + dy, current_col + dx
 
             if not (0 <= next_row < grid_size and 0 <= next_col < grid_size):
                 break
 
-            if (next_row, next_col) in visited:
-                path.append((next_row, next_col))
+            path.append((next_row, next_col))
+            bit = 1 << (next_row * grid_size + next_col)
+            if visited & bit:
                 break
 
-            path.append((next_row, next_col))
-            visited.add((next_row, next_col))
+            visited |= bit
             current_row, current_col = next_row, next_col
 
         return path
@@ -245,19 +323,39 @@ class TaskGenerator(BaseGenerator):
                 fill=color,
             )
 
-    def _render_grid(
-        self,
-        task_data: dict,
-        agent_pos=None,
-        visited_cells=None,
-        highlight_end: bool = False,
-    ) -> Image.Image:
-        width, height = self.config.image_size
-        img = Image.new("RGBA", (width, height), (*self.config.bg_color, 255))
-        draw = ImageDraw.Draw(img)
+    def _get_arrow_sprites(self, size: int, color) -> dict:
+        """Pre-render one transparent arrow tile per direction, cached by (size, color)."""
+        key = (size, color)
+        if key not in self._arrow_sprites:
+            half = size // 2
+            sprites = {}
+            for direction in self.DIRECTIONS:
+                sprite = Image.new("RGBA", (2 * half + 1, 2 * half + 1), (0, 0, 0, 0))
+                self._draw_arrow(
+                    ImageDraw.Draw(sprite), half, half, direction, size, color
+                )
+                sprites[direction] = sprite
+            self._arrow_sprites[key] = sprites
+        return self._arrow_sprites[key]
+
+    def _get_agent_sprite(self) -> Image.Image:
+        """Pre-render the semi-transparent agent dot on a tile just big enough for it."""
+        if self._agent_sprite is None:
+            radius = self.config.agent_radius
+            sprite = Image.new("RGBA", (2 * radius + 1, 2 * radius + 1), (0, 0, 0, 0))
+            ImageDraw.Draw(sprite).ellipse(
+                [0, 0, 2 * radius, 2 * radius],
+                fill=(*self.config.agent_color, self.config.agent_opacity),
+                outline=(0, 0, 0, 200),
+                width=1,
+            )
+            self._agent_sprite = sprite
+        return self._agent_sprite
 
+    def _grid_layout(self, task_data: dict) -> GridLayout:
+        """Compute cell size, grid origin and every cell centre once per task."""
+        width, height = self.config.image_size
         grid_size = task_data["grid_size"]
-        grid = task_data["grid"]
 
         margin = 50
         available = min(width, height) - 2 * margin
@@ -266,131 +364,220 @@ class TaskGenerator(BaseGenerator):
         start_x = (width - grid_size * cell_size) // 2
         start_y = (height - grid_size * cell_size) // 2
 
-        # Draw visited cells (yellow)
-        if visited_cells:
-            for row, col in visited_cells:
-                cx = start_x + col * cell_size + cell_size // 2
-                cy = start_y + row * cell_size + cell_size // 2
-                draw.rectangle(
-                    [
-                        cx - cell_size // 2 + 2,
-                        cy - cell_size // 2 + 2,
-                        cx + cell_size // 2 - 2,
-                        cy + cell_size // 2 - 2,
-                    ],
-                    fill=(*self.config.visited_color, 200),
+        centers = [
+            [
+                (
+                    start_x + col * cell_size + cell_size // 2,
+                    start_y + row * cell_size + cell_size // 2,
                 )
+                for col in range(grid_size)
+            ]
+            for row in range(grid_size)
+        ]
+        return GridLayout(cell_size, start_x, start_y, centers)
+
+    def _render_static_background(
+        self, task_data: dict, layout: GridLayout = None
+    ) -> Image.Image:
+        """Render the parts of the grid that never change: background, grid lines and arrows."""
+        if layout is None:
+            layout = self._grid_layout(task_data)
+        cell_size = layout.cell_size
+        start_x, start_y = layout.start_x, layout.start_y
 
-        # Highlight destination
-        if highlight_end:
-            end_row, end_col = task_data["end_row"], task_data["end_col"]
-            cx = start_x + end_col * cell_size + cell_size // 2
-            cy = start_y + end_row * cell_size + cell_size // 2
-            draw.rectangle(
-                [
-                    cx - cell_size // 2 + 1,
-                    cy - cell_size // 2 + 1,
-                    cx + cell_size // 2 - 1,
-                    cy + cell_size // 2 - 1,
-                ],
-                outline=self.config.destination_color,
-                width=4,
-            )
+        width, height = self.config.image_size
+        grid_size = task_data["grid_size"]
+        grid = task_data["grid"]
+        extent = grid_size * cell_size
+
+        buf = np.full((height, width, 4), (*self.config.bg_color, 255), dtype=np.uint8)
 
-        # Grid lines
+        # Grid lines: 2px wide with inclusive end points, as ImageDraw.line draws them
+        grid_rgba = (*self.config.grid_color, 255)
         for i in range(grid_size + 1):
             x = start_x + i * cell_size
-            draw.line(
-                [(x, start_y), (x, start_y + grid_size * cell_size)],
-                fill=(*self.config.grid_color, 255),
-                width=2,
-            )
+            buf[start_y : start_y + extent + 1, x : x + 2] = grid_rgba
             y = start_y + i * cell_size
-            draw.line(
-                [(start_x, y), (start_x + grid_size * cell_size, y)],
-                fill=(*self.config.grid_color, 255),
-                width=2,
-            )
+            buf[y : y + 2, start_x : start_x + extent + 1] = grid_rgba
+
+        img = Image.fromarray(buf)
 
         # Arrows
         arrow_size = int(cell_size * 0.5)
+        sprites = self._get_arrow_sprites(arrow_size, (*self.config.arrow_color, 255))
+        half = arrow_size // 2
         for row in range(grid_size):
             for col in range(grid_size):
-                cx = start_x + col * cell_size + cell_size // 2
-                cy = start_y + row * cell_size + cell_size // 2
-                self._draw_arrow(
-                    draw,
-                    cx,
-                    cy,
-                    grid[row][col],
-                    arrow_size,
-                    (*self.config.arrow_color, 255),
-                )
+                cx, cy = layout.centers[row][col]
+                sprite = sprites[grid[row][col]]
+                img.paste(sprite, (cx - half, cy - half), sprite)
+
+        return img
+
+    def _stamp_visited_cell(
+        self, img, draw, task_data: dict, layout: GridLayout, row, col
+    ):
+        """Fill a visited cell yellow and re-stamp the arrow the fill covers."""
+        cx, cy = layout.centers[row][col]
+        half_cell = layout.cell_size // 2
+        arrow_size = int(layout.cell_size * 0.5)
+
+        # The fill stays inside the grid lines, so only the arrow needs redrawing
+        draw.rectangle(
+            [
+                cx - half_cell + 2,
+                cy - half_cell + 2,
+                cx + half_cell - 2,
+                cy + half_cell - 2,
+            ],
+            fill=(*self.config.visited_color, 200),
+        )
+        sprites = self._get_arrow_sprites(arrow_size, (*self.config.arrow_color, 255))
+        sprite = sprites[task_data["grid"][row][col]]
+        img.paste(sprite, (cx - arrow_size // 2, cy - arrow_size // 2), sprite)
+
+    def _draw_destination(
+        self, img, draw, task_data: dict, layout: GridLayout
+    ) -> None:
+        """Outline the end cell, then redraw the grid lines and arrow it overlaps."""
+        cell_size = layout.cell_size
+        end_row, end_col = task_data["end_row"], task_data["end_col"]
+        cx, cy = layout.centers[end_row][end_col]
+        half_cell = cell_size // 2
+
+        draw.rectangle(
+            [
+                cx - half_cell + 1,
+                cy - half_cell + 1,
+                cx + half_cell - 1,
+                cy + half_cell - 1,
+            ],
+            outline=self.config.destination_color,
+            width=4,
+        )
+        # Grid lines sit on top of the border, as in the static background
+        x0 = layout.start_x + end_col * cell_size
+        y0 = layout.start_y + end_row * cell_size
+        for line in (
+            [(x0, y0), (x0, y0 + cell_size)],
+            [(x0 + cell_size, y0), (x0 + cell_size, y0 + cell_size)],
+            [(x0, y0), (x0 + cell_size, y0)],
+            [(x0, y0 + cell_size), (x0 + cell_size, y0 + cell_size)],
+        ):
+            draw.line(line, fill=(*self.config.grid_color, 255), width=2)
+        # On small cells the border reaches the arrow, which must stay on top
+        arrow_size = int(cell_size * 0.5)
+        sprites = self._get_arrow_sprites(arrow_size, (*self.config.arrow_color, 255))
+        sprite = sprites[task_data["grid"][end_row][end_col]]
+        img.paste(sprite, (cx - arrow_size // 2, cy - arrow_size // 2), sprite)
+
+    def _draw_agent(self, img, layout: GridLayout, row, col) -> None:
+        """Blend the semi-transparent agent dot over its bounding box only."""
+        cx, cy = layout.centers[row][col]
+        radius = self.config.agent_radius
+        img.alpha_composite(self._get_agent_sprite(), (cx - radius, cy - radius))
+
+    def _render_grid(
+        self,
+        task_data: dict,
+        agent_pos=None,
+        visited_cells=None,
+        highlight_end: bool = False,
+        background: Image.Image = None,
+        layout: GridLayout = None,
+    ) -> Image.Image:
+        """Render one RGBA frame; callers drop the alpha channel where they need RGB."""
+        if layout is None:
+            layout = self._grid_layout(task_data)
+        if background is None:
+            background = self._render_static_background(task_data, layout)
+
+        img = background.copy()
+        draw = ImageDraw.Draw(img)
+
+        # Draw visited cells (yellow)
+        if visited_cells:
+            for row, col in visited_cells:
+                self._stamp_visited_cell(img, draw, task_data, layout, row, col)
+
+        # Highlight destination
+        if highlight_end:
+            self._draw_destination(img, draw, task_data, layout)
 
         # Agent (semi-transparent blue dot)
         if agent_pos:
-            row, col = agent_pos
-            cx = start_x + col * cell_size + cell_size // 2
-            cy = start_y + row * cell_size + cell_size // 2
-            radius = self.config.agent_radius
+            self._draw_agent(img, layout, *agent_pos)
 
-            agent_layer = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-            agent_draw = ImageDraw.Draw(agent_layer)
-            agent_draw.ellipse(
-                [cx - radius, cy - radius, cx + radius, cy + radius],
-                fill=(*self.config.agent_color, self.config.agent_opacity),
-                outline=(0, 0, 0, 200),
-                width=1,
-            )
-            img = Image.alpha_composite(img, agent_layer)
-
-        return img.convert("RGB")
+        return img
 
-    def _render_initial_state(self, task_data: dict) -> Image.Image:
+    def _render_initial_state(
+        self, task_data: dict, background=None, layout: GridLayout = None
+    ) -> Image.Image:
         return self._render_grid(
-            task_data, agent_pos=(task_data["start_row"], task_data["start_col"])
-        )
+            task_data,
+            agent_pos=(task_data["start_row"], task_data["start_col"]),
+            background=background,
+            layout=layout,
+        ).convert("RGB")
 
-    def _render_final_state(self, task_data: dict) -> Image.Image:
+    def _render_final_state(
+        self, task_data: dict, background=None, layout: GridLayout = None
+    ) -> Image.Image:
         return self._render_grid(
             task_data,
             agent_pos=(task_data["end_row"], task_data["end_col"]),
             visited_cells=task_data["path"],
             highlight_end=True,
-        )
+            background=background,
+            layout=layout,
+        ).convert("RGB")
 
     def _generate_video(
-        self, first_image, final_image, task_id: str, task_data: dict
+        self,
+        first_image,
+        final_image,
+        task_id: str,
+        task_data: dict,
+        background=None,
+        layout: GridLayout = None,
     ) -> str:
         temp_dir = Path(tempfile.gettempdir()) / f"{self.config.domain}_videos"
         temp_dir.mkdir(parents=True, exist_ok=True)
         video_path = temp_dir / f"{task_id}_ground_truth.mp4"
 
-        frames = []
         hold_frames = 8
         frames_per_step = 6
 
         path = task_data["path"]
+        if layout is None:
+            layout = self._grid_layout(task_data)
+        if background is None:
+            background = self._render_static_background(task_data, layout)
+
+        # Frames are encoded as soon as they are rendered, never collected in a list
+        with self.video_generator.open_stream(
+            video_path, self.config.image_size
+        ) as stream:
+            stream.write(first_image, hold_frames)
+
+            # Visited cells only accumulate, so each step stamps just its own cell
+            canvas = background.copy()
+            canvas_draw = ImageDraw.Draw(canvas)
+            # One frame buffer is refilled every step; the stream encodes it right away
+            frame = Image.new("RGBA", canvas.size)
+            frame_draw = ImageDraw.Draw(frame)
+
+            for i, (row, col) in enumerate(path):
+                self._stamp_visited_cell(
+                    canvas, canvas_draw, task_data, layout, row, col
+                )
 
-        for _ in range(hold_frames):
-            frames.append(first_image.copy())
-
-        for i, (row, col) in enumerate(path):
-            visited_so_far = path[: i + 1]
-            is_last = i == len(path) - 1
-
-            frame = self._render_grid(
-                task_data,
-                agent_pos=(row, col),
-                visited_cells=visited_so_far,
-                highlight_end=is_last,
-            )
-
-            for _ in range(frames_per_step):
-                frames.append(frame.copy())
+                frame.paste(canvas, (0, 0))
+                if i == len(path) - 1:
+                    self._draw_destination(frame, frame_draw, task_data, layout)
+                self._draw_agent(frame, layout, row, col)
+                stream.write(frame, frames_per_step)
 
-        for _ in range(hold_frames * 2):
-            frames.append(final_image.copy())
+            stream.write(final_image, hold_frames * 2)
 
-        result = self.video_generator.create_video_from_frames(frames, video_path)
-        return str(result) if result else None
+        return str(stream.output_path)
@@ -0,0 +1,54 @@
+"""Compiled arrow-following for large grids (optional numba dependency)."""
+
+import importlib.util
+import numpy as np
+
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# Below this size the Python walk is faster than the kernel's call overhead
+NUMBA_MIN_GRID_SIZE = 20
+
+_compiled_kernel = None
+
+
+def _trace_path_kernel(grid_int, start_row, start_col, dr, dc):
+    """Follow the arrows from the start cell; returns the path as (row, col) rows."""
+    grid_size = grid_int.shape[0]
+    # At most every cell once, plus the revisited cell that closes a loop
+    path = np.empty((grid_size * grid_size + 1, 2), dtype=np.int32)
+    visited = np.zeros((grid_size, grid_size), dtype=np.bool_)
+
+    path[0, 0] = start_row
+    path[0, 1] = start_col
+    visited[start_row, start_col] = True
+    length = 1
+    row, col = start_row, start_col
+
+    for _ in range(grid_size * grid_size + 1):
+        direction = grid_int[row, col]
+        next_row = row + dr[direction]
+        next_col = col + dc[direction]
+
+        if not (0 <= next_row < grid_size and 0 <= next_col < grid_size):
+            break
+
+        path[length, 0] = next_row
+        path[length, 1] = next_col
+        length += 1
+        if visited[next_row, next_col]:
+            break
+
+        visited[next_row, next_col] = True
+        row, col = next_row, next_col
+
+    return path[:length]
+
+
+def trace_path_nb(grid_int, start_row, start_col, dr, dc):
+    """Run the compiled kernel, importing numba and compiling on first use."""
+    global _compiled_kernel
+    if _compiled_kernel is None:
+        from numba import njit
+
+        _compiled_kernel = njit(cache=True)(_trace_path_kernel)
+    return _compiled_kernel(grid_int, start_row, start_col, dr, dc)
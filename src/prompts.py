@@ -1,27 +1,53 @@
 """Arrow Maze Navigation Task Prompts - Clean version matching video exactly."""
 
+from functools import lru_cache
 
-def get_prompt(task_data: dict) -> str:
-    """Generate prompt that exactly describes what happens in the video."""
-    grid_size = task_data["grid_size"]
-    start_row = task_data["start_row"]
-    start_col = task_data["start_col"]
-    end_row = task_data["end_row"]
-    end_col = task_data["end_col"]
-    path_length = len(task_data["path"])
-    exit_direction = task_data["exit_direction"]
 
-    prompt = f"""{grid_size}x{grid_size} grid with directional arrows (↑↓←→) in each cell.
-A semi-transparent blue dot starts at row {start_row+1}, column {start_col+1}.
+PROMPT_TEMPLATE = """{grid_size}x{grid_size} grid with directional arrows (↑↓←→) in each cell.
+A semi-transparent blue dot starts at row {start_row}, column {start_col}.
 
 The dot follows the arrow in its current cell, moving one cell per step.
 Each visited cell is highlighted with a yellow background.
 The dot stops when the arrow points outside the grid boundary.
 
-The dot stops at row {end_row+1}, column {end_col+1} (arrow points {exit_direction}, outside boundary the ball enters a cycle (a looped path), e.g., the left cell points right and the right cell points left.).
+The dot stops at row {end_row}, column {end_col} (arrow points {exit_direction}, outside boundary the ball enters a cycle (a looped path), e.g., the left cell points right and the right cell points left.).
 Final destination has a green border. Total steps: {path_length}."""
 
-    return prompt
+
+@lru_cache(maxsize=4096)
+def _format_prompt(
+    grid_size: int,
+    start_row: int,
+    start_col: int,
+    end_row: int,
+    end_col: int,
+    path_length: int,
+    exit_direction: str,
+) -> str:
+    return PROMPT_TEMPLATE.format_map(
+        {
+            "grid_size": grid_size,
+            "start_row": start_row + 1,
+            "start_col": start_col + 1,
+            "end_row": end_row + 1,
+            "end_col": end_col + 1,
+            "path_length": path_length,
+            "exit_direction": exit_direction,
+        }
+    )
+
+
+def get_prompt(task_data: dict) -> str:
+    """Generate prompt that exactly describes what happens in the video."""
+    return _format_prompt(
+        task_data["grid_size"],
+        task_data["start_row"],
+        task_data["start_col"],
+        task_data["end_row"],
+        task_data["end_col"],
+        len(task_data["path"]),
+        task_data["exit_direction"],
+    )
 
 
 def get_all_prompts() -> list[str]: